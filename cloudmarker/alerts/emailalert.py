@@ -1,6 +1,7 @@
 """Email alert plugin."""
 
 
+import io
 import logging
 
 from cloudmarker import util
@@ -25,7 +26,8 @@ class EmailAlert:
 
         """
         self._kwargs = kwargs
-        self._buffer = []
+        self._buffer = io.StringIO()
+        self._separator = ''
 
     def write(self, record):
         """Save event record in a buffer.
@@ -34,10 +36,19 @@ class EmailAlert:
             record (dict): An event record.
 
         """
-        for _, value in record.items():
-            self._buffer.append(repr(value))
+        buffer_write = self._buffer.write
+        separator = self._separator
+        for value in record.values():
+            # Separate each value from the previous one with a blank
+            # line. Nothing precedes the first value in the buffer.
+            buffer_write(separator)
+            buffer_write(repr(value))
+            separator = '\n\n'
+        self._separator = separator
 
     def done(self):
         """Send the buffered events as an email alert."""
-        self._kwargs['content'] = '\n\n'.join(self._buffer)
+        self._kwargs['content'] = self._buffer.getvalue()
+        self._buffer = io.StringIO()
+        self._separator = ''
         util.send_email(**self._kwargs)
@@ -3,6 +3,7 @@
 Attributes:
     config_yaml (str): Base configuration as YAML code.
     config_dict (dict): Base configuration as Python dictionary.
+    SafeLoader (type): Fastest available safe YAML loader class.
 
 Here is the complete base configuration present as a string in the
 :obj:`config_yaml` attribute::
@@ -15,6 +16,15 @@ import textwrap
 
 import yaml
 
+# Use the LibYAML based loader when PyYAML is built with it. It parses
+# configuration several times faster than the pure Python loader and
+# produces the same result. The user configuration files are parsed
+# with this loader too.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 config_yaml = """# Base configuration
 plugins:
   mockcloud:
@@ -149,5 +159,5 @@ schedule: "00:00"
 """
 
 
-config_dict = yaml.safe_load(config_yaml)
+config_dict = yaml.load(config_yaml, Loader=SafeLoader)
 __doc__ = __doc__.format(textwrap.indent(config_yaml, '    '))
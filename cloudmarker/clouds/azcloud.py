@@ -5,6 +5,7 @@ from Microsoft Azure.
 """
 
 
+import itertools
 import logging
 
 from azure.common.credentials import ServicePrincipalCredentials
@@ -19,12 +20,65 @@ from cloudmarker import ioworkers, util
 
 _log = logging.getLogger(__name__)
 
+# Dictionary to map Azure record types to common record types.
+_RECORD_TYPE_MAP = {
+    'virtual_machine': 'compute',
+    'mysql_server': 'rdbms',
+}
+
+# Dictionary to map Azure record types to a function that returns the
+# management client class, the name of the operations attribute of
+# the client and the name of the list method to call on it. The client
+# class is looked up only when a client is created, not when this
+# module is imported.
+_RESOURCE_ITERATORS = {
+    'virtual_machine': (lambda: ComputeManagementClient,
+                        'virtual_machines', 'list_all'),
+    'app_gateway': (lambda: NetworkManagementClient,
+                    'application_gateways', 'list_all'),
+    'lb': (lambda: NetworkManagementClient, 'load_balancers', 'list_all'),
+    'nic': (lambda: NetworkManagementClient,
+            'network_interfaces', 'list_all'),
+    'nsg': (lambda: NetworkManagementClient,
+            'network_security_groups', 'list_all'),
+    'public_ip': (lambda: NetworkManagementClient,
+                  'public_ip_addresses', 'list_all'),
+    'storage_account': (lambda: StorageManagementClient,
+                        'storage_accounts', 'list'),
+    'resource_group': (lambda: ResourceManagementClient,
+                       'resource_groups', 'list'),
+    'mysql_server': (lambda: MySQLManagementClient, 'servers', 'list'),
+    'web_apps': (lambda: WebSiteManagementClient, 'web_apps', 'list'),
+}
+
+# Dictionaries to map Azure source address prefixes and destination
+# port ranges to their equivalents in common notation.
+_SOURCE_ADDRESS_MAP = {
+    '*': '0.0.0.0/0',
+    'Internet': '0.0.0.0/0',
+}
+_DESTINATION_PORT_MAP = {
+    '*': '0-65535',
+}
+
+# Dictionary to map Azure security rule directions to common notation.
+_DIRECTION_MAP = {
+    'inbound': 'in',
+    'outbound': 'out',
+}
+
+# Dictionary to map Azure security rule protocols to common notation.
+_PROTOCOL_MAP = {
+    '*': 'all',
+}
+
 
 class AzCloud:
     """Azure cloud plugin."""
 
     def __init__(self, tenant, client, secret, processes=4,
-                 threads=30, _max_subs=0, _max_recs=0):
+                 threads=30, subscription_ids=None, _max_subs=0,
+                 _max_recs=0):
         """Create an instance of :class:`AzCloud` plugin.
 
          Note: The ``_max_subs`` and ``_max_recs`` arguments should be
@@ -38,6 +92,8 @@ class AzCloud:
             secret (str): Azure service principal password.
             processes (int): Number of processes to launch.
             threads (int): Number of threads to launch in each process.
+            subscription_ids (list): IDs of subscriptions to fetch data
+                for. See :func:`cloudmarker.util.get_az_subscriptions`.
             _max_subs (int): Maximum number of subscriptions to fetch
                 data for if the value is greater than 0.
             _max_recs (int): Maximum number of records of each type to
@@ -52,6 +108,7 @@ class AzCloud:
         self._tenant = tenant
         self._processes = processes
         self._threads = threads
+        self._subscription_ids = subscription_ids
         self._max_subs = _max_subs
         self._max_recs = _max_recs
         _log.info('Initialized; tenant: %s; processes: %s; threads: %s',
@@ -84,14 +141,22 @@ class AzCloud:
         """
         try:
             sub_client = SubscriptionClient(self._credentials)
-            sub_list = sub_client.subscriptions.list()
+
+            sub_list = util.get_az_subscriptions(
+                sub_client, self._subscription_ids, self._tenant)
 
             record_types = ('virtual_machine', 'app_gateway', 'lb', 'nic',
                             'nsg', 'public_ip', 'storage_account',
                             'resource_group', 'mysql_server',
                             'web_apps', 'subscription')
 
+            # Fetch data for only self._max_subs number of subscriptions
+            # if self._max_subs is greater than 0.
+            if self._max_subs > 0:
+                sub_list = itertools.islice(sub_list, self._max_subs)
+
             tenant = self._tenant
+            sub_index = -1
             for sub_index, sub in enumerate(sub_list):
                 sub = sub.as_dict()
                 _log.info('Found %s', util.outline_az_sub(sub_index,
@@ -102,14 +167,12 @@ class AzCloud:
                 for record_type in record_types:
                     yield (record_type, sub_index, sub)
 
-                # Break after pulling data for self._max_subs number of
-                # subscriptions. Note that if self._max_subs is 0 or less,
-                # then the following condition never evaluates to True.
-                if sub_index + 1 == self._max_subs:
-                    _log.info('Stopping subscriptions fetch due to '
-                              '_max_subs: %d; tenant: %s', self._max_subs,
-                              self._tenant)
-                    break
+            # Log only if the limit was reached. There may be fewer
+            # subscriptions than self._max_subs.
+            if self._max_subs > 0 and sub_index + 1 == self._max_subs:
+                _log.info('Stopping subscriptions fetch due to '
+                          '_max_subs: %d; tenant: %s', self._max_subs,
+                          self._tenant)
 
         except Exception as e:
             _log.error('Failed to fetch subscriptions; %s; error: %s: %s',
@@ -186,51 +249,17 @@ def _get_resource_iterator(record_type, credentials,
             over a list of Azure resource objects.
 
     """
-    sub_id = sub.get('subscription_id')
-
-    if record_type == 'virtual_machine':
-        client = ComputeManagementClient(credentials, sub_id)
-        return client.virtual_machines.list_all()
-
-    if record_type == 'app_gateway':
-        client = NetworkManagementClient(credentials, sub_id)
-        return client.application_gateways.list_all()
-
-    if record_type == 'lb':
-        client = NetworkManagementClient(credentials, sub_id)
-        return client.load_balancers.list_all()
-
-    if record_type == 'nic':
-        client = NetworkManagementClient(credentials, sub_id)
-        return client.network_interfaces.list_all()
-
-    if record_type == 'nsg':
-        client = NetworkManagementClient(credentials, sub_id)
-        return client.network_security_groups.list_all()
-
-    if record_type == 'public_ip':
-        client = NetworkManagementClient(credentials, sub_id)
-        return client.public_ip_addresses.list_all()
-
-    if record_type == 'storage_account':
-        client = StorageManagementClient(credentials, sub_id)
-        return client.storage_accounts.list()
-
-    if record_type == 'resource_group':
-        client = ResourceManagementClient(credentials, sub_id)
-        return client.resource_groups.list()
-
-    if record_type == 'mysql_server':
-        client = MySQLManagementClient(credentials, sub_id)
-        return client.servers.list()
-
-    if record_type == 'web_apps':
-        client = WebSiteManagementClient(credentials, sub_id)
-        return client.web_apps.list()
+    spec = _RESOURCE_ITERATORS.get(record_type)
+    if spec is not None:
+        get_client_class, operations_name, method_name = spec
+        client = util.get_az_client(get_client_class(), credentials,
+                                    sub.get('subscription_id'))
+        operations = getattr(client, operations_name)
+        return getattr(operations, method_name)()
 
     # If control reaches here, there is a bug in this plugin. It means
     # there is a value in record_types variable in _get_subscriptions
-    # that is not handled in the above if-statements.
+    # that is not handled in _RESOURCE_ITERATORS.
     _log.warning('Unrecognized record_type: %s; %s', record_type,
                  util.outline_az_sub(sub_index, sub, tenant))
     return None
@@ -253,56 +282,68 @@ def _get_record(iterator, azure_record_type, max_recs,
         dict: An Azure record of type ``record_type``.
 
     """
-    # Dictionary to map Azure record types to common record types.
-    record_type_map = {
-        'virtual_machine': 'compute',
-        'mysql_server': 'rdbms',
+    # The ext and com buckets are the same for every record of this
+    # type in this subscription, so build them once and copy them for
+    # each record.
+    ext = {
+        'cloud_type': 'azure',
+        'record_type': azure_record_type,
+        'subscription_id': sub.get('subscription_id'),
+        'tenant_id': tenant,
+        'subscription_name': sub.get('display_name'),
+        'subscription_state': sub.get('state'),
     }
+    com = {
+        'cloud_type': 'azure',
+        'record_type': _RECORD_TYPE_MAP.get(azure_record_type)
+    }
+
+    # Format the subscription summary for log messages only once
+    # instead of once per record.
+    sub_outline = util.outline_az_sub(sub_index, sub, tenant)
 
+    # Fetch only max_recs number of records if max_recs is greater
+    # than 0. Since the iterator is consumed lazily, no further pages
+    # are requested from Azure once the limit is reached.
+    if max_recs > 0:
+        iterator = itertools.islice(iterator, max_recs)
+
+    i = -1
     for i, v in enumerate(iterator):
         raw_record = v.as_dict()
         record = {
             'raw': raw_record,
-            'ext': {
-                'cloud_type': 'azure',
-                'record_type': azure_record_type,
-                'subscription_id': sub.get('subscription_id'),
-                'tenant_id': tenant,
-                'subscription_name': sub.get('display_name'),
-                'subscription_state': sub.get('state'),
-            },
-            'com': {
-                'cloud_type': 'azure',
-                'record_type': record_type_map.get(azure_record_type)
-            }
+            'ext': ext.copy(),
+            'com': com.copy(),
         }
 
-        _log.info('Found %s #%d: %s; %s', azure_record_type, i,
-                  raw_record.get('name'),
-                  util.outline_az_sub(sub_index, sub, tenant))
+        # Skip the name lookup and the call when INFO logs are off.
+        if _log.isEnabledFor(logging.INFO):
+            _log.info('Found %s #%d: %s; %s', azure_record_type, i,
+                      raw_record.get('name'), sub_outline)
 
         # For every security rule found in an NSG, generate a
         # separate security rule (firewall rule) record to maintain
         # parity with separate records for separate firewall rules
         # in GCP.
         if azure_record_type == 'nsg':
-            yield from _get_normalized_firewall_rules(
-                record, sub_index, sub, tenant)
+            yield from _get_normalized_firewall_rules(record,
+                                                      sub_outline)
 
-        if azure_record_type in ['mysql_server']:
+        if azure_record_type == 'mysql_server':
             yield from _get_normalized_rdbms_record(record)
-            return
+            continue
 
         yield record
 
-        if i + 1 == max_recs:
-            _log.info('Stopping %s fetch due to _max_recs: %d; %s',
-                      azure_record_type, max_recs,
-                      util.outline_az_sub(sub_index, sub, tenant))
-            break
+    # Log only if the limit was reached. There may be fewer records
+    # than max_recs.
+    if max_recs > 0 and i + 1 == max_recs:
+        _log.info('Stopping %s fetch due to _max_recs: %d; %s',
+                  azure_record_type, max_recs, sub_outline)
 
 
-def _get_normalized_firewall_rules(nsg_record, sub_index, sub, tenant):
+def _get_normalized_firewall_rules(nsg_record, sub_outline):
     """Split a network security group (NSG) into multiple firewall rules.
 
     An Azure NSG record contains a top-level key named
@@ -313,175 +354,127 @@ def _get_normalized_firewall_rules(nsg_record, sub_index, sub, tenant):
 
     Arguments:
         nsg_record (dict): NSG record generated by this plugin.
-        sub_index (int): Subscription index (for logging only)
-        sub (Subscription): Azure subscription object (for logging only)
-        tenant (str): Azure tenant ID (for logging only)
+        sub_outline (str): Subscription summary (for logging only).
 
     Yields:
         dict: A normalized firewall rule record with ``com`` bucket
             populated with firewall rule properties in common notation.
 
     """
-    security_rules = nsg_record.get('raw', {}).get('security_rules')
-    nsg_name = nsg_record.get('raw', {}).get('name')
+    nsg_raw = nsg_record.get('raw') or {}
+    security_rules = nsg_raw.get('security_rules')
+    nsg_name = nsg_raw.get('name')
 
     if security_rules is None:
         _log.warning('Found NSG without security_rules; name: %s; %s',
-                     nsg_name, util.outline_az_sub(sub_index, sub, tenant))
+                     nsg_name, sub_outline)
         return
 
+    # The extended properties of the NSG record hold only flat values,
+    # so a shallow merge per security rule is enough.
+    nsg_ext = nsg_record.get('ext') or {}
+    nsg_id = nsg_raw.get('id')
+
     for i, security_rule in enumerate(security_rules):
         record = {
             'raw': security_rule,
 
             # Preserve the extended properties from NSG record.
-            'ext': util.merge_dicts(nsg_record.get('ext'), {
+            'ext': {
+                **nsg_ext,
 
                 # Set extended properties specific to a security rule.
                 'record_type': 'security_rule',
-                'nsg_id': nsg_record.get('raw', {}).get('id'),
+                'nsg_id': nsg_id,
                 'security_rule_id': security_rule.get('id'),
-            }),
-
-            'com': {
-                'cloud_type': 'azure',
-                'record_type': 'firewall_rule',
-                'reference': security_rule.get('id'),
-
-                'enabled':
-                    _get_normalized_firewall_state(security_rule),
+            },
 
-                'direction':
-                    _get_normalized_firewall_direction(security_rule),
+            'com': _get_normalized_firewall_rule(security_rule),
+        }
 
-                'access':
-                    _get_normalized_firewall_access(security_rule),
+        if _log.isEnabledFor(logging.INFO):
+            _log.info('Found security_rule #%d: %s; %s',
+                      i, security_rule.get('name'), sub_outline)
+        yield record
 
-                'source_addresses':
-                    _get_normalized_firewall_source_addresses(security_rule),
 
-                'protocol':
-                    _get_normalized_firewall_protocol(security_rule),
+def _get_normalized_firewall_rule(security_rule):
+    """Normalize the properties of an NSG security rule.
 
-                'destination_ports':
-                    _get_normalized_firewall_destination_ports(security_rule),
-            }
-        }
+    All properties are normalized in a single pass over the security
+    rule so that each key of the security rule is looked up only once.
 
-        _log.info('Found security_rule #%d: %s; %s',
-                  i, security_rule.get('name'),
-                  util.outline_az_sub(sub_index, sub, tenant))
-        yield record
+    Arguments:
+        security_rule (dict): Security rule from an Azure NSG record.
 
+    Returns:
+        dict: Firewall rule properties in common notation.
 
-def _get_normalized_firewall_state(security_rule):
+    """
     rule_name = security_rule.get('name')
-    state = security_rule.get('provisioning_state')
 
+    state = security_rule.get('provisioning_state')
     if state is None:
         _log.warning('Found security rule without provisioning_state; '
                      'name: %s', rule_name)
-        return None
-
-    return state.lower() == 'succeeded'
-
+    else:
+        state = state.lower() == 'succeeded'
 
-def _get_normalized_firewall_direction(security_rule):
-    rule_name = security_rule.get('name')
     direction = security_rule.get('direction')
-
     if direction is None:
         _log.warning('Found security rule without direction; name: %s',
                      rule_name)
-        return None
-
-    direction = direction.lower()
-
-    if direction == 'inbound':
-        return 'in'
-
-    if direction == 'outbound':
-        return 'out'
-
-    _log.warning('Found unknown direction in security rule; '
-                 'direction: %s; name: %s', direction, rule_name)
-    return direction
-
+    else:
+        direction = direction.lower()
+        if direction in _DIRECTION_MAP:
+            direction = _DIRECTION_MAP[direction]
+        else:
+            _log.warning('Found unknown direction in security rule; '
+                         'direction: %s; name: %s', direction, rule_name)
 
-def _get_normalized_firewall_access(security_rule):
-    rule_name = security_rule.get('name')
     access = security_rule.get('access')
-
     if access is None:
         _log.warning('Found security rule without access; name: %s',
                      rule_name)
-        return None
-
-    access = access.lower()
-
-    if access in ('allow', 'deny'):
-        return access
-
-    _log.warning('Found unknown access in security rule; '
-                 'access: %s; name: %s', access, rule_name)
-    return access
-
-
-def _get_normalized_firewall_source_addresses(security_rule):
-    all_prefixes = []
+    else:
+        access = access.lower()
+        if access not in ('allow', 'deny'):
+            _log.warning('Found unknown access in security rule; '
+                         'access: %s; name: %s', access, rule_name)
 
     prefix = security_rule.get('source_address_prefix')
-    if prefix is not None:
-        all_prefixes.append(prefix)
-
     prefixes = security_rule.get('source_address_prefixes')
-    if prefixes is not None:
-        all_prefixes.extend(prefixes)
-
-    source_addresses = []
-    for prefix in all_prefixes:
-        if prefix in ('*', 'Internet'):
-            source_addresses.append('0.0.0.0/0')
-        else:
-            source_addresses.append(prefix)
-
-    return source_addresses
+    source_addresses = [
+        _SOURCE_ADDRESS_MAP.get(p, p) for p in itertools.chain(
+            () if prefix is None else (prefix,), prefixes or ())
+    ]
 
-
-def _get_normalized_firewall_protocol(security_rule):
-    rule_name = security_rule.get('name')
     protocol = security_rule.get('protocol')
-
     if protocol is None:
         _log.warning('Found security rule without protocol; name: %s',
                      rule_name)
-        return None
-
-    protocol = protocol.lower()
-    if protocol == '*':
-        return 'all'
-    return protocol
-
-
-def _get_normalized_firewall_destination_ports(security_rule):
-    all_ports = []
+    else:
+        protocol = protocol.lower()
+        protocol = _PROTOCOL_MAP.get(protocol, protocol)
 
     port = security_rule.get('destination_port_range')
-    if port not in (None, ''):
-        all_ports.append(port)
-
     ports = security_rule.get('destination_port_ranges')
-    if ports is not None:
-        all_ports.extend(ports)
-
-    destination_ports = []
-    for port in all_ports:
-        if port == '*':
-            destination_ports.append('0-65535')
-        else:
-            destination_ports.append(port)
-
-    return destination_ports
+    destination_ports = [
+        _DESTINATION_PORT_MAP.get(p, p) for p in itertools.chain(
+            (port,) if port else (), ports or ())
+    ]
+
+    return {
+        'cloud_type': 'azure',
+        'record_type': 'firewall_rule',
+        'reference': security_rule.get('id'),
+        'enabled': state,
+        'direction': direction,
+        'access': access,
+        'source_addresses': source_addresses,
+        'protocol': protocol,
+        'destination_ports': destination_ports,
+    }
 
 
 def _get_normalized_rdbms_record(rdbms_record):
@@ -494,17 +487,21 @@ def _get_normalized_rdbms_record(rdbms_record):
         dict: A normalized rdbms record.
 
     """
-    ssl_enforcement = rdbms_record.get('raw', {}).get('ssl_enforcement')
-    ssl_connection_enabled = (ssl_enforcement == 'Enabled')
+    # The ext and com buckets of the RDBMS record hold only flat values,
+    # so a shallow merge is enough.
+    raw = rdbms_record.get('raw', {})
+    rdbms_id = raw.get('id')
+    ssl_connection_enabled = (raw.get('ssl_enforcement') == 'Enabled')
     normalized_rdbms_record = {
-        'raw': rdbms_record.get('raw', {}),
-        'ext': util.merge_dicts(rdbms_record.get('ext'), {
-            'reference': rdbms_record.get('raw', {}).get('id'),
-        }),
-        'com': util.merge_dicts(rdbms_record.get('com'), {
-            'reference': rdbms_record.get('raw', {}).get('id'),
+        'raw': raw,
+        'ext': {
+            **(rdbms_record.get('ext') or {}),
+            'reference': rdbms_id,
+        },
+        'com': {
+            **(rdbms_record.get('com') or {}),
+            'reference': rdbms_id,
             'tls_enforced': ssl_connection_enabled,
-        }),
-
+        },
     }
     yield normalized_rdbms_record
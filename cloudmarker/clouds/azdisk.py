@@ -5,12 +5,12 @@ from Microsoft Azure.
 """
 
 
+import itertools
 import logging
 
 from azure.common.credentials import ServicePrincipalCredentials
 from azure.mgmt.compute import ComputeManagementClient
 from azure.mgmt.resource import SubscriptionClient
-from msrestazure import tools
 
 from cloudmarker import ioworkers, util
 
@@ -85,20 +85,25 @@ class AzDisk:
             sub_client = SubscriptionClient(creds)
             sub_list = sub_client.subscriptions.list()
 
+            # Fetch data for only self._max_subs number of subscriptions
+            # if self._max_subs is greater than 0.
+            if self._max_subs > 0:
+                sub_list = itertools.islice(sub_list, self._max_subs)
+
+            sub_index = -1
             for sub_index, sub in enumerate(sub_list):
                 sub = sub.as_dict()
                 _log.info('Found %s', util.outline_az_sub(sub_index,
                                                           sub, tenant))
 
                 yield from self._get_subscription_disks(sub_index, sub)
-                # Break after pulling data for self._max_subs number of
-                # subscriptions. Note that if self._max_subs is 0 or less,
-                # then the following condition never evaluates to True.
-                if sub_index + 1 == self._max_subs:
-                    _log.info('Stopping subscriptions fetch due to '
-                              '_max_subs: %d; tenant: %s', self._max_subs,
-                              tenant)
-                    break
+
+            # Log only if the limit was reached. There may be fewer
+            # subscriptions than self._max_subs.
+            if self._max_subs > 0 and sub_index + 1 == self._max_subs:
+                _log.info('Stopping subscriptions fetch due to '
+                          '_max_subs: %d; tenant: %s', self._max_subs,
+                          tenant)
 
         except Exception as e:
             _log.error('Failed to fetch subscriptions; %s; error: %s: %s',
@@ -121,59 +126,61 @@ class AzDisk:
             tenant = self._tenant
             creds = self._credentials
             sub_id = sub.get('subscription_id')
-            compute_client = ComputeManagementClient(creds, sub_id)
+            compute_client = util.get_az_client(ComputeManagementClient,
+                                                creds, sub_id)
             disk_list = compute_client.disks.list()
 
+            # Format the subscription summary for log messages only
+            # once instead of once per disk.
+            sub_outline = util.outline_az_sub(sub_index, sub, tenant)
+
+            # Fetch only self._max_recs number of disks for a
+            # subscription if self._max_recs is greater than 0.
+            if self._max_recs > 0:
+                disk_list = itertools.islice(disk_list, self._max_recs)
+
+            disk_index = -1
             for disk_index, disk in enumerate(disk_list):
+                # The disks returned by the list call are complete, so
+                # pass them on as they are instead of fetching each
+                # disk again.
                 disk = disk.as_dict()
-                disk_id = disk.get('id')
-                disk_name = disk.get('name')
                 _log.info('Found disk #%d: %s; %s',
-                          disk_index, disk_name,
-                          util.outline_az_sub(sub_index, sub, tenant))
-                rg_name = \
-                    tools.parse_resource_id(disk_id)['resource_group']
-                yield (disk_index, disk_name, rg_name, sub_index, sub)
-
-                # Break after pulling data for self._max_recs number
-                # of disks for a subscriber. Note that if
-                # self._max_recs is 0 or less, then the following
-                # condition never evaluates to True.
-                if disk_index + 1 == self._max_recs:
-                    _log.info('Stopping disk fetch due '
-                              'to _max_recs: %d; %s', self._max_recs,
-                              util.outline_az_sub(sub_index, sub,
-                                                  self._tenant))
-                    break
+                          disk_index, disk.get('name'), sub_outline)
+                yield (disk_index, disk, sub_index, sub)
+
+            # Log only if the limit was reached. There may be fewer
+            # disks than self._max_recs.
+            if self._max_recs > 0 and disk_index + 1 == self._max_recs:
+                _log.info('Stopping disk fetch due to _max_recs: %d; %s',
+                          self._max_recs, sub_outline)
         except Exception as e:
             _log.error('Failed to fetch disks; %s; error: %s: %s',
                        util.outline_az_sub(sub_index, sub, tenant),
                        type(e).__name__, e)
 
-    def _get_disk_details(self, disk_index, disk_name, rg_name,
-                          sub_index, sub):
+    def _get_disk_details(self, disk_index, disk, sub_index, sub):
         """Get details of disk.
 
         Arguments:
+            disk_index (int): Disk index (for logging only).
+            disk (dict): Raw disk record.
             sub_index (int): Subscription index (for logging only).
             sub (Subscription): Azure subscription object.
-            rg_name (str): Resource group name.
-            disk_index (int): Disk index (for logging only).
-            disk_name (str): Name of the disk.
 
         Yields:
             dict: An Azure disk record.
 
         """
-        _log.info('Working on disk #%d: %s; %s', disk_index,
-                  disk_name, util.outline_az_sub(disk_index, sub,
-                                                 self._tenant))
+        disk_name = disk.get('name')
+
+        # Skip formatting the subscription summary when INFO logs are
+        # off since this runs once for every disk.
+        if _log.isEnabledFor(logging.INFO):
+            _log.info('Working on disk #%d: %s; %s', disk_index,
+                      disk_name, util.outline_az_sub(sub_index, sub,
+                                                     self._tenant))
         try:
-            sub_id = sub.get('subscription_id')
-            creds = self._credentials
-            compute_client = ComputeManagementClient(creds, sub_id)
-            disk = compute_client.disks.get(rg_name, disk_name)
-            disk = disk.as_dict()
             yield _process_disk_details(sub, disk)
         except Exception as e:
             _log.error('Failed to fetch disk details #%d: '
@@ -14,6 +14,7 @@ from azure.keyvault import KeyVaultAuthentication, KeyVaultClient
 from azure.keyvault.models import KeyVaultErrorException
 from azure.mgmt.keyvault import KeyVaultManagementClient
 from azure.mgmt.resource import SubscriptionClient
+from msrest.exceptions import ClientException
 from msrestazure import tools
 from msrestazure.azure_exceptions import CloudError
 
@@ -26,7 +27,7 @@ class AzKV:
     """Azure Key Vault plugin."""
 
     def __init__(self, tenant, client, secret, processes=4, threads=30,
-                 _max_subs=0, _max_recs=0):
+                 subscription_ids=None, _max_subs=0, _max_recs=0):
         """Create an instance of :class:`AzKV` plugin.
 
          Note: The ``_max_subs`` and ``_max_recs`` arguments should be
@@ -40,6 +41,8 @@ class AzKV:
             secret (str): Azure service principal password.
             processes (int): Number of worker processes to run.
             threads (int): Number of worker threads to run.
+            subscription_ids (list): IDs of subscriptions to fetch data
+                for. See :func:`cloudmarker.util.get_az_subscriptions`.
             _max_subs (int): Maximum number of subscriptions to fetch
                 data for if the value is greater than 0.
             _max_recs (int): Maximum number of Key Vault records
@@ -60,6 +63,7 @@ class AzKV:
         self._tenant = tenant
         self._processes = processes
         self._threads = threads
+        self._subscription_ids = subscription_ids
         self._max_subs = _max_subs
         self._max_recs = _max_recs
         _log.info('Initialized; tenant: %s; processes: %s; threads: %s',
@@ -94,24 +98,32 @@ class AzKV:
             tenant = self._tenant
             creds = self._credentials
             sub_client = SubscriptionClient(creds)
-            sub_list = sub_client.subscriptions.list()
 
+            sub_list = util.get_az_subscriptions(
+                sub_client, self._subscription_ids, self._tenant)
+
+            # Fetch data for only self._max_subs number of subscriptions
+            # if self._max_subs is greater than 0.
+            if self._max_subs > 0:
+                sub_list = itertools.islice(sub_list, self._max_subs)
+
+            sub_index = -1
             for sub_index, sub in enumerate(sub_list):
                 sub = sub.as_dict()
-                _log.info('Found %s', util.outline_az_sub(sub_index,
-                                                          sub, tenant))
+                if _log.isEnabledFor(logging.INFO):
+                    _log.info('Found %s', util.outline_az_sub(sub_index,
+                                                              sub, tenant))
 
                 yield from self._get_subscription_kvs(sub_index, sub)
-                # Break after pulling data for self._max_subs number of
-                # subscriptions. Note that if self._max_subs is 0 or less,
-                # then the following condition never evaluates to True.
-                if sub_index + 1 == self._max_subs:
-                    _log.info('Stopping subscriptions fetch due to '
-                              '_max_subs: %d; tenant: %s', self._max_subs,
-                              tenant)
-                    break
 
-        except CloudError as e:
+            # Log only if the limit was reached. There may be fewer
+            # subscriptions than self._max_subs.
+            if self._max_subs > 0 and sub_index + 1 == self._max_subs:
+                _log.info('Stopping subscriptions fetch due to '
+                          '_max_subs: %d; tenant: %s', self._max_subs,
+                          tenant)
+
+        except (CloudError, ClientException) as e:
             _log.error('Failed to fetch subscriptions; %s; error: %s: %s',
                        util.outline_az_sub(sub_index, sub, tenant),
                        type(e).__name__, e)
@@ -132,34 +144,41 @@ class AzKV:
             tenant = self._tenant
             creds = self._credentials
             subscription_id = sub.get('subscription_id')
-            key_vault_mgmt_client = KeyVaultManagementClient(creds,
-                                                             subscription_id)
+            key_vault_mgmt_client = util.get_az_client(
+                KeyVaultManagementClient, creds, subscription_id)
             key_vault_list = key_vault_mgmt_client.vaults.list()
 
+            # Fetch only self._max_recs number of Key Vaults for a
+            # subscription if self._max_recs is greater than 0.
+            if self._max_recs > 0:
+                key_vault_list = itertools.islice(key_vault_list,
+                                                  self._max_recs)
+
+            key_vault_index = -1
             for key_vault_index, key_vault in enumerate(key_vault_list):
                 key_vault = key_vault.as_dict()
                 key_vault_name = key_vault.get('name')
                 key_vault_id = key_vault.get('id')
-                _log.info('Found key_vault #%d: %s; %s',
-                          key_vault_index, key_vault_name,
-                          util.outline_az_sub(sub_index, sub, tenant))
+                # Skip formatting the subscription summary when INFO
+                # logs are off since this runs once for every vault.
+                if _log.isEnabledFor(logging.INFO):
+                    _log.info('Found key_vault #%d: %s; %s',
+                              key_vault_index, key_vault_name,
+                              util.outline_az_sub(sub_index, sub, tenant))
                 rg_name = \
                     tools.parse_resource_id(key_vault_id)['resource_group']
 
                 yield (key_vault_index, key_vault_name,
                        rg_name, sub_index, sub)
 
-                # Break after pulling data for self._max_recs number
-                # of Key Vault for a subscriber. Note that if
-                # self._max_recs is 0 or less, then the following
-                # condition never evaluates to True.
-                if key_vault_index + 1 == self._max_recs:
-                    _log.info('Stopping Key Vault fetch due '
-                              'to _max_recs: %d; %s', self._max_recs,
-                              util.outline_az_sub(sub_index, sub,
-                                                  self._tenant))
-                    break
-        except CloudError as e:
+            # Log only if the limit was reached. There may be fewer Key
+            # Vaults than self._max_recs.
+            if (self._max_recs > 0 and
+                    key_vault_index + 1 == self._max_recs):
+                _log.info('Stopping Key Vault fetch due to _max_recs: %d; '
+                          '%s', self._max_recs,
+                          util.outline_az_sub(sub_index, sub, tenant))
+        except (CloudError, ClientException) as e:
             _log.error('Failed to fetch Key Vault; %s; error: %s: %s',
                        util.outline_az_sub(sub_index, sub, tenant),
                        type(e).__name__, e)
@@ -184,16 +203,17 @@ class AzKV:
             token = credentials.token
             return token['token_type'], token['access_token']
 
-        _log.info('Working on key_vault #%d: %s; %s', key_vault_index,
-                  key_vault_name, util.outline_az_sub(sub_index, sub,
-                                                      self._tenant))
+        if _log.isEnabledFor(logging.INFO):
+            _log.info('Working on key_vault #%d: %s; %s', key_vault_index,
+                      key_vault_name, util.outline_az_sub(sub_index, sub,
+                                                          self._tenant))
         subscription_id = sub.get('subscription_id')
         creds = self._credentials
-        key_vault_mgmt_client = KeyVaultManagementClient(creds,
-                                                         subscription_id)
+        key_vault_mgmt_client = util.get_az_client(
+            KeyVaultManagementClient, creds, subscription_id)
         key_vault_details = key_vault_mgmt_client.vaults.get(rg_name,
                                                              key_vault_name)
-        yield from _get_normalized_key_vault_record(key_vault_details, sub)
+        yield _get_normalized_key_vault_record(key_vault_details, sub)
         try:
             kv_client = \
                 KeyVaultClient(KeyVaultAuthentication(_auth_callback))
@@ -240,6 +260,17 @@ def _get_data_record(iterator, azure_record_type, sub_index, sub,
         dict: Normalized Key Vault data plane record.
 
     """
+    # These values are the same for every record of the subscription,
+    # so compute them once instead of once per record.
+    sub_outline = util.outline_az_sub(sub_index, sub, tenant)
+    base_ext = {
+        'cloud_type': 'azure',
+        'record_type': azure_record_type,
+        'subscription_id': sub.get('subscription_id'),
+        'subscription_name': sub.get('display_name'),
+        'subscription_state': sub.get('state'),
+    }
+
     try:
         for i, v in enumerate(iterator):
             raw_record = v.as_dict()
@@ -251,14 +282,10 @@ def _get_data_record(iterator, azure_record_type, sub_index, sub,
             record = {
                 'raw': raw_record,
                 'ext': {
-                    'cloud_type': 'azure',
+                    **base_ext,
                     'expiry_set': expiry_set,
                     'enabled': enabled,
-                    'record_type': azure_record_type,
                     'reference': reference,
-                    'subscription_id': sub.get('subscription_id'),
-                    'subscription_name': sub.get('display_name'),
-                    'subscription_state': sub.get('state'),
                 },
                 'com': {
                     'cloud_type': 'azure',
@@ -268,14 +295,12 @@ def _get_data_record(iterator, azure_record_type, sub_index, sub,
             }
 
             _log.info('Found %s #%d: %s; %s', azure_record_type, i, reference,
-                      util.outline_az_sub(sub_index, sub, tenant))
+                      sub_outline)
             yield record
 
     except KeyVaultErrorException as e:
         _log.error('Failed to fetch details for %s; %s; error: %s: %s',
-                   azure_record_type,
-                   util.outline_az_sub(sub_index, sub, tenant),
-                   type(e).__name__, e)
+                   azure_record_type, sub_outline, type(e).__name__, e)
 
 
 def _get_normalized_key_vault_record(key_vault_record, sub):
@@ -290,13 +315,9 @@ def _get_normalized_key_vault_record(key_vault_record, sub):
 
     """
     raw_record = key_vault_record.as_dict()
-    enable_soft_delete = False
-    if raw_record['properties'].get('enable_soft_delete'):
-        enable_soft_delete = raw_record['properties'].get('enable_soft_delete')
-    enable_purge_protection = False
-    if raw_record['properties'].get('enable_purge_protection'):
-        enable_purge_protection = raw_record['properties']. \
-                                  get('enable_purge_protection')
+    properties = raw_record['properties']
+    enable_soft_delete = bool(properties.get('enable_soft_delete'))
+    enable_purge_protection = bool(properties.get('enable_purge_protection'))
     record = {
         'raw': raw_record,
         'ext': {
@@ -315,4 +336,4 @@ def _get_normalized_key_vault_record(key_vault_record, sub):
             'reference': raw_record.get('id', {}),
         }
     }
-    yield record
+    return record
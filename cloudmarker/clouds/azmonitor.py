@@ -5,6 +5,7 @@ from Microsoft Azure.
 """
 
 
+import itertools
 import logging
 
 from azure.common.credentials import ServicePrincipalCredentials
@@ -20,7 +21,8 @@ class AzMonitor:
     """Azure monitor plugin."""
 
     def __init__(self, tenant, client, secret, processes=4,
-                 threads=30, _max_subs=0, _max_recs=0):
+                 threads=30, subscription_ids=None, _max_subs=0,
+                 _max_recs=0):
         """Create an instance of :class:`AzMonitor` plugin.
 
          Note: The ``_max_subs`` and ``_max_recs`` arguments should be
@@ -34,6 +36,8 @@ class AzMonitor:
             secret (str): Azure service principal password.
             processes (int): Number of processes to launch.
             threads (int): Number of threads to launch in each process.
+            subscription_ids (list): IDs of subscriptions to fetch data
+                for. See :func:`cloudmarker.util.get_az_subscriptions`.
             _max_subs (int): Maximum number of subscriptions to fetch
                 data for if the value is greater than 0.
             _max_recs (int): Maximum number of records of each type to
@@ -48,6 +52,7 @@ class AzMonitor:
         self._tenant = tenant
         self._processes = processes
         self._threads = threads
+        self._subscription_ids = subscription_ids
         self._max_subs = _max_subs
         self._max_recs = _max_recs
         _log.info('Initialized; tenant: %s; processes: %s; threads: %s',
@@ -80,35 +85,35 @@ class AzMonitor:
         """
         try:
             sub_client = SubscriptionClient(self._credentials)
-            sub_list = sub_client.subscriptions.list()
+
+            sub_list = util.get_az_subscriptions(
+                sub_client, self._subscription_ids, self._tenant)
+
+            # Fetch data for only self._max_subs number of subscriptions
+            # if self._max_subs is greater than 0.
+            if self._max_subs > 0:
+                sub_list = itertools.islice(sub_list, self._max_subs)
 
             monitor_attributes = ('log_profile',)
 
             tenant = self._tenant
+            sub_index = -1
             for sub_index, sub in enumerate(sub_list):
                 sub = sub.as_dict()
-                _log.info('Found %s', util.outline_az_sub(sub_index,
-                                                          sub, tenant))
+                if _log.isEnabledFor(logging.INFO):
+                    _log.info('Found %s', util.outline_az_sub(sub_index,
+                                                              sub, tenant))
                 # Each record type for each subscription is a unit of
                 # work that would be fed to _get_resources().
                 for attribute_type in monitor_attributes:
-                    if attribute_type == 'log_profile':
-                        sub['locations'] = []
-                        locations = sub_client.subscriptions. \
-                            list_locations(sub.get('subscription_id'))
-                        for location in locations:
-                            sub['locations'].append(location.as_dict()
-                                                    .get('name'))
                     yield (attribute_type, sub_index, sub)
 
-                # Break after pulling data for self._max_subs number of
-                # subscriptions. Note that if self._max_subs is 0 or less,
-                # then the following condition never evaluates to True.
-                if sub_index + 1 == self._max_subs:
-                    _log.info('Stopping subscriptions fetch due to '
-                              '_max_subs: %d; tenant: %s', self._max_subs,
-                              self._tenant)
-                    break
+            # Log only if the limit was reached. There may be fewer
+            # subscriptions than self._max_subs.
+            if self._max_subs > 0 and sub_index + 1 == self._max_subs:
+                _log.info('Stopping subscriptions fetch due to '
+                          '_max_subs: %d; tenant: %s', self._max_subs,
+                          tenant)
 
         except Exception as e:
             _log.error('Failed to fetch subscriptions; %s; error: %s: %s',
@@ -127,12 +132,32 @@ class AzMonitor:
             dict: An Azure monitor record.
 
         """
-        _log.info('Working on %s', util.outline_az_sub(sub_index, sub,
-                                                       self._tenant))
+        if _log.isEnabledFor(logging.INFO):
+            _log.info('Working on %s', util.outline_az_sub(sub_index, sub,
+                                                           self._tenant))
         try:
+            if attribute_type == 'log_profile':
+                # Look up the subscription locations here in the worker
+                # thread instead of in _get_subscriptions(), so that the
+                # lookups for different subscriptions run concurrently
+                # instead of holding up the feeding of work units.
+                sub_client = util.get_az_client(SubscriptionClient,
+                                                self._credentials, None)
+                locations = sub_client.subscriptions.list_locations(
+                    sub.get('subscription_id'))
+
+                # Add the locations to a copy of the subscription, so
+                # that the subscription passed in is left unchanged.
+                sub = {
+                    **sub,
+                    'locations': [location.as_dict().get('name')
+                                  for location in locations],
+                }
+
             monitor_client = \
-                MonitorManagementClient(self._credentials,
-                                        sub.get('subscription_id'))
+                util.get_az_client(MonitorManagementClient,
+                                   self._credentials,
+                                   sub.get('subscription_id'))
             iterator = \
                 _get_attribute_iterator(attribute_type, monitor_client,
                                         sub, sub_index, self._tenant)
@@ -195,6 +220,10 @@ def _get_record(iterator, attribute_type, max_recs,
         dict: An Azure record of type ``attribute_type``.
 
     """
+    # This value is the same for every record of the subscription, so
+    # compute it once instead of once per record.
+    sub_outline = util.outline_az_sub(sub_index, sub, tenant)
+
     base_record = {
         'ext': {
             'cloud_type': 'azure',
@@ -209,29 +238,37 @@ def _get_record(iterator, attribute_type, max_recs,
         }
     }
 
+    base_ext = base_record['ext']
+    base_com = base_record['com']
+
     records_missing = True
 
+    # Fetch only max_recs number of records if max_recs is greater
+    # than 0.
+    if max_recs > 0:
+        iterator = itertools.islice(iterator, max_recs)
+
+    i = -1
     for i, v in enumerate(iterator):
         raw_record = v.as_dict()
         _log.info('Found %s #%d: %s; %s', attribute_type, i,
-                  raw_record.get('name'),
-                  util.outline_az_sub(sub_index, sub, tenant))
-        retention_policy = raw_record.get('retention_policy')
-        record = util.merge_dicts(base_record, {
+                  raw_record.get('name'), sub_outline)
+        retention_policy = raw_record.get('retention_policy') or {}
+        # Overlay the per-record values on shallow copies of the base
+        # buckets. util.merge_dicts() would deep copy the base record
+        # and the raw record for every record.
+        record = {
             'raw': raw_record,
             'ext': {
-                'cloud_type': 'azure',
-                'record_type': attribute_type,
-                'subscription_id': sub.get('subscription_id'),
-                'subscription_name': sub.get('display_name'),
-                'subscription_state': sub.get('state'),
+                **base_ext,
                 'retention_enabled': retention_policy.get('enabled'),
                 'retention_days': retention_policy.get('days'),
             },
             'com': {
+                **base_com,
                 'reference': raw_record.get('id'),
             }
-        })
+        }
         if 'locations' in sub:
             # Record the locations in which the subscription exists.
             record['ext']['subscription_locations'] = sub.get('locations')
@@ -244,15 +281,14 @@ def _get_record(iterator, attribute_type, max_recs,
 
         yield record
 
-        if i + 1 == max_recs:
-            _log.info('Stopping %s fetch due to _max_recs: %d; %s',
-                      attribute_type, max_recs,
-                      util.outline_az_sub(sub_index, sub, tenant))
-            break
+    # Log only if the limit was reached. There may be fewer records
+    # than max_recs.
+    if max_recs > 0 and i + 1 == max_recs:
+        _log.info('Stopping %s fetch due to _max_recs: %d; %s',
+                  attribute_type, max_recs, sub_outline)
 
     if records_missing:
-        _log.info('Missing %s; %s', attribute_type,
-                  util.outline_az_sub(sub_index, sub, tenant))
+        _log.info('Missing %s; %s', attribute_type, sub_outline)
 
         record = util.merge_dicts(base_record, {
             'raw': None,
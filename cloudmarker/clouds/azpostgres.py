@@ -5,11 +5,13 @@ data from Microsoft Azure.
 """
 
 
+import itertools
 import logging
 
 from azure.common.credentials import ServicePrincipalCredentials
 from azure.mgmt.rdbms.postgresql import PostgreSQLManagementClient
 from azure.mgmt.resource import SubscriptionClient
+from msrest.exceptions import ClientException
 from msrestazure import tools
 from msrestazure.azure_exceptions import CloudError
 
@@ -17,6 +19,18 @@ from cloudmarker import ioworkers, util
 
 _log = logging.getLogger(__name__)
 
+# These are the configuration names which will be processed to have a
+# derived value. Also, name of these configuration will be suffixed
+# with `_enabled` if the `data_type` is Boolean.
+_DERIVED_CONFIG_NAMES = frozenset({
+    'log_checkpoints',
+    'log_connections',
+    'log_disconnections',
+    'log_duration',
+    'connection_throttling',
+    'log_retention_days',
+})
+
 
 class AzPostgres:
     """Azure Postgres plugin."""
@@ -86,6 +100,12 @@ class AzPostgres:
             sub_client = SubscriptionClient(creds)
             sub_list = sub_client.subscriptions.list()
 
+            # Fetch data for only self._max_subs number of subscriptions
+            # if self._max_subs is greater than 0.
+            if self._max_subs > 0:
+                sub_list = itertools.islice(sub_list, self._max_subs)
+
+            sub_index = -1
             for sub_index, sub in enumerate(sub_list):
                 sub = sub.as_dict()
                 _log.info('Found %s', util.outline_az_sub(sub_index,
@@ -93,16 +113,15 @@ class AzPostgres:
 
                 yield from self._get_subscription_postgres_servers(sub_index,
                                                                    sub)
-                # Break after pulling data for self._max_subs number of
-                # subscriptions. Note that if self._max_subs is 0 or less,
-                # then the following condition never evaluates to True.
-                if sub_index + 1 == self._max_subs:
-                    _log.info('Stopping subscriptions fetch due to '
-                              '_max_subs: %d; tenant: %s', self._max_subs,
-                              tenant)
-                    break
-
-        except CloudError as e:
+
+            # Log only if the limit was reached. There may be fewer
+            # subscriptions than self._max_subs.
+            if self._max_subs > 0 and sub_index + 1 == self._max_subs:
+                _log.info('Stopping subscriptions fetch due to '
+                          '_max_subs: %d; tenant: %s', self._max_subs,
+                          tenant)
+
+        except (CloudError, ClientException) as e:
             _log.error('Failed to fetch subscriptions; %s; error: %s: %s',
                        util.outline_az_sub(sub_index, sub, tenant),
                        type(e).__name__, e)
@@ -119,38 +138,44 @@ class AzPostgres:
                 :meth:`_get_postgres_details`.
 
         """
+        # The subscription summary is the same for every server of the
+        # subscription, so compute it once instead of once per server.
+        sub_outline = util.outline_az_sub(sub_index, sub, self._tenant)
         try:
-            tenant = self._tenant
             creds = self._credentials
             sub_id = sub.get('subscription_id')
-            postgres_client = PostgreSQLManagementClient(creds, sub_id)
+            postgres_client = util.get_az_client(PostgreSQLManagementClient,
+                                                 creds, sub_id)
             db_server_list = postgres_client.servers.list()
 
+            # Fetch only self._max_recs number of Postgres servers for a
+            # subscription if self._max_recs is greater than 0.
+            if self._max_recs > 0:
+                db_server_list = itertools.islice(db_server_list,
+                                                  self._max_recs)
+
+            server_index = -1
             for server_index, postgres_server in enumerate(db_server_list):
-                postgres_server = postgres_server.as_dict()
-                server_id = postgres_server.get('id')
-                server_name = postgres_server.get('name')
+                # Only the ID and name of the server are needed here, so
+                # read them from the model object instead of serializing
+                # the whole server. The worker fetches the full server
+                # details again anyway.
+                server_id = postgres_server.id
+                server_name = postgres_server.name
                 _log.info('Found Postgres Server #%d: %s; %s',
-                          server_index, server_name,
-                          util.outline_az_sub(sub_index, sub, tenant))
+                          server_index, server_name, sub_outline)
                 rg_name = \
                     tools.parse_resource_id(server_id)['resource_group']
                 yield (server_index, server_name, rg_name, sub_index, sub)
 
-                # Break after pulling data for self._max_recs number
-                # of Postgres servers for a subscriber. Note that if
-                # self._max_recs is 0 or less, then the following
-                # condition never evaluates to True.
-                if server_index + 1 == self._max_recs:
-                    _log.info('Stopping Postgres server fetch due '
-                              'to _max_recs: %d; %s', self._max_recs,
-                              util.outline_az_sub(sub_index, sub,
-                                                  self._tenant))
-                    break
-        except CloudError as e:
+            # Log only if the limit was reached. There may be fewer
+            # servers than self._max_recs.
+            if self._max_recs > 0 and server_index + 1 == self._max_recs:
+                _log.info('Stopping Postgres server fetch due to '
+                          '_max_recs: %d; %s', self._max_recs, sub_outline)
+        except (CloudError, ClientException) as e:
             _log.error('Failed to fetch Postgres servers; %s; error: %s: %s',
-                       util.outline_az_sub(sub_index, sub, tenant),
-                       type(e).__name__, e)
+                       sub_outline, type(e).__name__, e)
 
     def _get_postgres_server_details(self, server_index, server_name, rg_name,
                                      sub_index, sub):
@@ -167,12 +192,16 @@ class AzPostgres:
             dict: An Azure Postgres server record with configuration.
 
         """
-        _log.info('Working on Postgres server #%d: %s; %s', server_index,
-                  server_name, util.outline_az_sub(sub_index, sub,
-                                                   self._tenant))
+        # Skip formatting the subscription summary when INFO logs are
+        # off since this runs once for every server.
+        if _log.isEnabledFor(logging.INFO):
+            _log.info('Working on Postgres server #%d: %s; %s',
+                      server_index, server_name,
+                      util.outline_az_sub(sub_index, sub, self._tenant))
         sub_id = sub.get('subscription_id')
         creds = self._credentials
-        postgres_client = PostgreSQLManagementClient(creds, sub_id)
+        postgres_client = util.get_az_client(PostgreSQLManagementClient,
+                                             creds, sub_id)
         server_details = postgres_client.servers.get(rg_name, server_name)
         server_details = server_details.as_dict()
         server_configuration_list = \
@@ -202,25 +231,17 @@ class AzPostgres:
         """
         derived_configs = {}
         configuration_list = []
-        # These are the configuration names which will be processed to
-        # have a derived value. Also, name of these configuration will
-        # be suffixed with `_enabled` if the `data_type` is Boolean.
-        config_names_to_derive = ['log_checkpoints', 'log_connections',
-                                  'log_disconnections', 'log_duration',
-                                  'connection_throttling',
-                                  'log_retention_days']
-        for _, configuration in enumerate(server_configuration_list):
+        for configuration in server_configuration_list:
             config = configuration.as_dict()
             configuration_list.append(config)
-            if config['name'] in config_names_to_derive:
-                if config['data_type'] == 'Boolean':
-                    derived_configs[config['name'] + '_enabled'] = \
-                        False
-                    if config['value'].lower() == 'on':
-                        derived_configs[config['name'] + '_enabled'] = \
-                            True
-                elif config['data_type'] == 'Integer':
-                    derived_configs[config['name']] = int(config['value'])
+            name = config['name']
+            if name in _DERIVED_CONFIG_NAMES:
+                data_type = config['data_type']
+                if data_type == 'Boolean':
+                    derived_configs[name + '_enabled'] = \
+                        config['value'].lower() == 'on'
+                elif data_type == 'Integer':
+                    derived_configs[name] = int(config['value'])
         return configuration_list, derived_configs
 
     def _process_postgres_server_details(self, sub, server, configuration,
@@ -248,7 +269,7 @@ class AzPostgres:
                 'subscription_id': sub.get('subscription_id'),
                 'subscription_name': sub.get('display_name'),
                 'subscription_state': sub.get('state'),
-
+                **derived_configurations,
             },
             'com': {
                 'cloud_type': 'azure',
@@ -257,7 +278,4 @@ class AzPostgres:
                 'tls_enforced': ssl_connection_enabled,
             }
         }
-        record['ext'] = util.merge_dicts(
-            record['ext'], derived_configurations
-            )
         yield record
@@ -13,10 +13,16 @@ these multiple processes.
 import logging
 import multiprocessing
 import os
+import queue
 import threading
 
 _log = logging.getLogger(__name__)
 
+# Maximum number of output values a thread worker puts in the output
+# queue as a single list. Sending values in batches reduces the number
+# of pickling and inter-process queue operations per value.
+_BATCH_SIZE = 64
+
 
 def run(input_func, output_func, processes=0, threads=0, log_tag=''):
     """Run concurrent input/output workers with specified functions.
@@ -38,7 +44,9 @@ def run(input_func, output_func, processes=0, threads=0, log_tag=''):
             input.
         processes (int): Number of worker processes to run. If
             unspecified or ``0`` or negative integer is specified, then
-            the number returned by :func:`os.cpu_count` is used.
+            the number returned by :func:`os.cpu_count` is used. If
+            ``1`` is specified, the worker threads are run in the
+            current process.
         threads (int): Number of worker threads to run in each process.
             If unspecified or ``0`` or negative integer is specified,
             then `5` multiplied by the number returned by
@@ -60,15 +68,25 @@ def run(input_func, output_func, processes=0, threads=0, log_tag=''):
     if log_tag != '':
         log_tag += ': '
 
-    in_q = multiprocessing.Queue()
-    out_q = multiprocessing.Queue()
+    # With a single worker process, the thread workers are run in
+    # this process instead. A separate process would not add any
+    # parallelism then, but every input and output value would still
+    # need to be pickled to pass through a multiprocessing queue.
+    if processes == 1:
+        queue_class = queue.Queue
+        worker_class = threading.Thread
+    else:
+        queue_class = multiprocessing.Queue
+        worker_class = multiprocessing.Process
+
+    in_q = queue_class()
+    out_q = queue_class()
 
     # Create process workers.
     process_workers = []
     for _ in range(processes):
-        w = multiprocessing.Process(target=_process_worker,
-                                    args=(in_q, out_q, threads,
-                                          output_func, log_tag))
+        w = worker_class(target=_process_worker,
+                         args=(in_q, out_q, threads, output_func, log_tag))
         w.start()
         process_workers.append(w)
 
@@ -114,8 +132,18 @@ def _thread_worker(in_q, out_q, output_func, log_tag):
                 _log.info('thread_worker: %sStopping', log_tag)
                 out_q.put(None)
                 break
-            for record in output_func(*work):
-                out_q.put(record)
+            batch = []
+            try:
+                for record in output_func(*work):
+                    batch.append(record)
+                    if len(batch) == _BATCH_SIZE:
+                        out_q.put(batch)
+                        batch = []
+            finally:
+                # Do not lose the output values obtained before a
+                # failure in output_func.
+                if batch:
+                    out_q.put(batch)
         except Exception as e:
             _log.exception('thread_worker: %sFailed; error: %s: %s',
                            log_tag, type(e).__name__, e)
@@ -127,13 +155,13 @@ def _get_output(out_q, processes, threads, log_tag):
     stopped_threads = 0
     while True:
         try:
-            record = out_q.get()
-            if record is None:
+            batch = out_q.get()
+            if batch is None:
                 stopped_threads += 1
                 if stopped_threads == processes * threads:
                     break
                 continue
-            yield record
+            yield from batch
         except Exception as e:
             _log.exception('%sFailed to get output; error: %s: %s',
                            log_tag, type(e).__name__, e)
@@ -91,6 +91,9 @@ def _run(config):
     end_time = time.localtime()
     _send_email(config.get('email'), 'all audits', start_time, end_time)
 
+    # Do not keep SMTP sessions open until the next scheduled run.
+    util.close_smtp_sessions()
+
 
 class Audit:
     """Audit manager.
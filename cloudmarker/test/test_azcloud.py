@@ -580,3 +580,58 @@ class AzCloudTest(unittest.TestCase):
                          'azure_mysql_server_id')
         self.assertEqual(records[0]['com']['record_type'],
                          'rdbms')
+
+    def test_max_recs(self):
+        m = self._MockComputeManagementClient
+        m().virtual_machines.list_all.return_value = [SimpleMock()] * 3
+
+        records = list(azcloud.AzCloud('', '', '', _max_recs=2).read())
+        records = [
+            r for r in records
+            if r['ext']['record_type'] == 'virtual_machine'
+        ]
+        self.assertEqual(len(records), 2)
+
+    def test_subscription_ids(self):
+        m = self._MockSubscriptionClient
+        m().subscriptions.get.return_value = SimpleMock()
+
+        records = list(azcloud.AzCloud('', '', '', subscription_ids=[
+            'foo_sub_id', 'bar_sub_id']).read())
+        records = [
+            r for r in records
+            if r['ext']['record_type'] == 'subscription'
+        ]
+
+        self.assertEqual(len(records), 2)
+        m().subscriptions.get.assert_has_calls([
+            mock.call('foo_sub_id'), mock.call('bar_sub_id')])
+        m().subscriptions.list.assert_not_called()
+
+    def test_subscription_ids_failing_first_id(self):
+        m = self._MockSubscriptionClient
+        m().subscriptions.get.side_effect = [Exception('foo'), SimpleMock()]
+
+        records = list(azcloud.AzCloud('', '', '', subscription_ids=[
+            'foo_sub_id', 'bar_sub_id']).read())
+        records = [
+            r for r in records
+            if r['ext']['record_type'] == 'subscription'
+        ]
+
+        self.assertEqual(len(records), 1)
+        m().subscriptions.get.assert_has_calls([
+            mock.call('foo_sub_id'), mock.call('bar_sub_id')])
+
+    def test_mysql_server_multiple_records(self):
+        mock_mysql_server = SimpleMock({'id': 'azure_mysql_server_id'})
+
+        m = self._MockMySQLManagementClient
+        m().servers.list.return_value = [mock_mysql_server, mock_mysql_server]
+
+        records = list(azcloud.AzCloud('', '', '').read())
+        records = [
+            r for r in records
+            if r['ext']['record_type'] == 'mysql_server'
+        ]
+        self.assertEqual(len(records), 2)
@@ -124,3 +124,29 @@ class AzSQLTest(unittest.TestCase):
         self.assertEqual(records[0]['com']['cloud_type'], 'azure')
         self.assertEqual(records[0]['com']['record_type'], 'disk')
         self.assertEqual(records[0]['com']['reference'], base_disk_id)
+
+    def test_max_recs(self):
+        mock_disk = SimpleMock(copy.deepcopy(base_disk))
+        m = self._MockComputeManagementClient
+        m().disks.list.return_value = [mock_disk] * 3
+        records = list(azdisk.AzDisk('', '', '', _max_recs=2).read())
+        self.assertEqual(len(records), 2)
+
+    def test_max_recs_reached_logs_stop(self):
+        mock_disk = SimpleMock(copy.deepcopy(base_disk))
+        m = self._MockComputeManagementClient
+        m().disks.list.return_value = [mock_disk] * 3
+        with self.assertLogs('cloudmarker.clouds.azdisk', 'INFO') as cm:
+            list(azdisk.AzDisk('', '', '', _max_recs=2).read())
+        self.assertTrue(any('Stopping disk fetch' in line
+                            for line in cm.output))
+
+    def test_max_recs_not_reached_logs_no_stop(self):
+        mock_disk = SimpleMock(copy.deepcopy(base_disk))
+        m = self._MockComputeManagementClient
+        m().disks.list.return_value = [mock_disk]
+        with self.assertLogs('cloudmarker.clouds.azdisk', 'INFO') as cm:
+            records = list(azdisk.AzDisk('', '', '', _max_recs=2).read())
+        self.assertEqual(len(records), 1)
+        self.assertFalse(any('Stopping disk fetch' in line
+                             for line in cm.output))
@@ -0,0 +1,118 @@
+"""Tests for AzKV plugin."""
+
+import copy
+import unittest
+from unittest import mock
+
+from msrest.exceptions import ClientRequestError
+
+from cloudmarker.clouds import azkv
+
+base_sub_id = 'foo_sub_id'
+
+base_subscription_record = {
+    'subscription_id': base_sub_id,
+    'display_name': 'foo_display_name',
+    'state': 'foo_state',
+}
+
+base_key_vault_id = ('/subscriptions/foo_sub_id/resourceGroups/foo_rg/'
+                     'providers/Microsoft.KeyVault/vaults/foo_kv')
+
+base_key_vault = {
+    'id': base_key_vault_id,
+    'name': 'foo_kv',
+    'properties': {
+        'vault_uri': 'https://foo_kv.vault.azure.net/',
+        'enable_soft_delete': True,
+    },
+}
+
+
+class SimpleMock:
+    """A simple picklable class.
+
+    AzKV sends subscription object and cloud records from main
+    process to worker processes and vice versa, so any mocks we use need
+    to be picklable (serializable). The :class:`unittest.mock.Mock` and
+    :class:`unittest.mock.MagicMock` classes are unpicklable, therefore
+    we create our own mock class here.
+    """
+
+    def __init__(self, data=None):
+        self._data = data if data else {}
+
+    def as_dict(self):
+        return self._data
+
+
+class AzKVTest(unittest.TestCase):
+    """Tests for AzKV plugin."""
+
+    def _patch(self, target):
+        patcher = mock.patch('cloudmarker.clouds.azkv.' + target)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def setUp(self):
+        self._patch('ServicePrincipalCredentials')
+        self._patch('KeyVaultAuthentication')
+
+        mock_sub_record = SimpleMock(copy.deepcopy(base_subscription_record))
+        m = self._patch('SubscriptionClient')
+        self._MockSubscriptionClient = m
+        m().subscriptions.list.return_value = [mock_sub_record]
+
+        mock_key_vault = SimpleMock(copy.deepcopy(base_key_vault))
+        mock_key_vault.properties = SimpleMock()
+        mock_key_vault.properties.vault_uri = \
+            base_key_vault['properties']['vault_uri']
+        m = self._patch('KeyVaultManagementClient')
+        self._MockKeyVaultManagementClient = m
+        m().vaults.list.return_value = [SimpleMock(base_key_vault)]
+        m().vaults.get.return_value = mock_key_vault
+
+        m = self._patch('KeyVaultClient')
+        self._MockKeyVaultClient = m
+        m().get_secrets.return_value = []
+        m().get_keys.return_value = []
+
+    def _records(self, records, record_type):
+        return [r for r in records if r['ext']['record_type'] == record_type]
+
+    def test_key_vault(self):
+        records = list(azkv.AzKV('', '', '').read())
+        records = self._records(records, 'key_vault')
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['ext']['subscription_id'], base_sub_id)
+        self.assertTrue(records[0]['ext']['enable_soft_delete'])
+        self.assertFalse(records[0]['ext']['enable_purge_protection'])
+        self.assertEqual(records[0]['com']['reference'], base_key_vault_id)
+
+    def test_subscription_ids(self):
+        m = self._MockSubscriptionClient
+        m().subscriptions.get.return_value = \
+            SimpleMock(copy.deepcopy(base_subscription_record))
+        records = list(azkv.AzKV('', '', '', subscription_ids=[
+            base_sub_id]).read())
+        self.assertEqual(len(self._records(records, 'key_vault')), 1)
+        m().subscriptions.get.assert_called_once_with(base_sub_id)
+        m().subscriptions.list.assert_not_called()
+
+    def test_subscription_ids_failing_first_id(self):
+        m = self._MockSubscriptionClient
+        m().subscriptions.get.side_effect = [
+            Exception('foo'),
+            SimpleMock(copy.deepcopy(base_subscription_record)),
+        ]
+        records = list(azkv.AzKV('', '', '', subscription_ids=[
+            'bar_sub_id', base_sub_id]).read())
+        self.assertEqual(len(self._records(records, 'key_vault')), 1)
+        m().subscriptions.get.assert_has_calls([
+            mock.call('bar_sub_id'), mock.call(base_sub_id)])
+
+    def test_throttled_key_vault_list(self):
+        m = self._MockKeyVaultManagementClient
+        m().vaults.list.side_effect = ClientRequestError('foo')
+        records = list(azkv.AzKV('', '', '').read())
+        self.assertEqual(records, [])
@@ -93,3 +93,74 @@ class AzSQLTest(unittest.TestCase):
         self.assertEqual(records[0]['com']['cloud_type'], 'azure')
         self.assertEqual(records[0]['com']['record_type'], 'log_profile')
         self.assertEqual(records[0]['com']['reference'], base_log_profile_id)
+
+    def test_subscription_ids(self):
+        mock_sub_record_dict = copy.deepcopy(base_subscription_record)
+        m = self._MockSubscriptionClient
+        m().subscriptions.get.return_value = SimpleMock(mock_sub_record_dict)
+        mock_log_profile = SimpleMock(copy.deepcopy(base_log_profile))
+        mm = self._MockMonitorManagementClient
+        mm().log_profiles.list.return_value = [mock_log_profile]
+        records = list(azmonitor.AzMonitor('', '', '', subscription_ids=[
+            base_sub_id]).read())
+        self.assertEqual(len(records), 1)
+        m().subscriptions.get.assert_called_once_with(base_sub_id)
+        m().subscriptions.list.assert_not_called()
+
+    def test_subscription_locations(self):
+        m = self._MockSubscriptionClient
+        m().subscriptions.list_locations.return_value = [
+            SimpleMock({'name': 'foo_location'}),
+            SimpleMock({'name': 'bar_location'}),
+        ]
+        mock_log_profile = SimpleMock(copy.deepcopy(base_log_profile))
+        m = self._MockMonitorManagementClient
+        m().log_profiles.list.return_value = [mock_log_profile]
+        records = list(azmonitor.AzMonitor('', '', '').read())
+        self.assertEqual(records[0]['ext']['subscription_locations'],
+                         ['foo_location', 'bar_location'])
+
+    def test_log_profile_without_retention_policy(self):
+        mock_log_profile_dict = copy.deepcopy(base_log_profile)
+        del mock_log_profile_dict['retention_policy']
+        mock_log_profile = SimpleMock(mock_log_profile_dict)
+        m = self._MockMonitorManagementClient
+        m().log_profiles.list.return_value = [mock_log_profile]
+        records = list(azmonitor.AzMonitor('', '', '').read())
+        self.assertEqual(len(records), 1)
+        self.assertIsNone(records[0]['ext']['retention_enabled'])
+        self.assertIsNone(records[0]['ext']['retention_days'])
+
+    def test_subscription_locations_do_not_modify_sub(self):
+        sub = copy.deepcopy(base_subscription_record)
+        m = self._MockSubscriptionClient
+        m().subscriptions.list.return_value = [SimpleMock(sub)]
+        m().subscriptions.list_locations.return_value = [
+            SimpleMock({'name': 'foo_location'}),
+        ]
+        mock_log_profile = SimpleMock(copy.deepcopy(base_log_profile))
+        mm = self._MockMonitorManagementClient
+        mm().log_profiles.list.return_value = [mock_log_profile]
+
+        # With a single process, the worker threads run in this process
+        # and receive the same subscription dictionary.
+        records = list(azmonitor.AzMonitor('', '', '', processes=1).read())
+        self.assertEqual(records[0]['ext']['subscription_locations'],
+                         ['foo_location'])
+        self.assertEqual(sub, base_subscription_record)
+
+    def test_subscription_ids_failing_first_id(self):
+        m = self._MockSubscriptionClient
+        m().subscriptions.get.side_effect = [
+            Exception('foo'),
+            SimpleMock(copy.deepcopy(base_subscription_record)),
+        ]
+        mock_log_profile = SimpleMock(copy.deepcopy(base_log_profile))
+        mm = self._MockMonitorManagementClient
+        mm().log_profiles.list.return_value = [mock_log_profile]
+        records = list(azmonitor.AzMonitor('', '', '', subscription_ids=[
+            'bar_sub_id', base_sub_id]).read())
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['ext']['subscription_id'], base_sub_id)
+        m().subscriptions.get.assert_has_calls([
+            mock.call('bar_sub_id'), mock.call(base_sub_id)])
@@ -0,0 +1,121 @@
+"""Tests for AzPostgres plugin."""
+
+import copy
+import unittest
+from unittest import mock
+
+from msrest.exceptions import ClientRequestError
+
+from cloudmarker.clouds import azpostgres
+
+base_sub_id = 'foo_sub_id'
+
+base_subscription_record = {
+    'subscription_id': base_sub_id,
+    'display_name': 'foo_display_name',
+    'state': 'foo_state',
+}
+
+base_server_id = ('/subscriptions/foo_sub_id/resourceGroups/foo_rg/'
+                  'providers/Microsoft.DBforPostgreSQL/servers/{}')
+
+base_configurations = [
+    {'name': 'log_checkpoints', 'data_type': 'Boolean', 'value': 'ON'},
+    {'name': 'log_connections', 'data_type': 'Boolean', 'value': 'off'},
+    {'name': 'log_disconnections', 'data_type': 'Boolean', 'value': 'on'},
+    {'name': 'log_duration', 'data_type': 'Boolean', 'value': 'OFF'},
+    {'name': 'connection_throttling', 'data_type': 'Boolean',
+     'value': 'on'},
+    {'name': 'log_retention_days', 'data_type': 'Integer', 'value': '3'},
+    {'name': 'work_mem', 'data_type': 'Integer', 'value': '4096'},
+]
+
+
+class SimpleMock:
+    """A simple picklable class.
+
+    AzPostgres sends subscription object and cloud records from main
+    process to worker processes and vice versa, so any mocks we use need
+    to be picklable (serializable). The :class:`unittest.mock.Mock` and
+    :class:`unittest.mock.MagicMock` classes are unpicklable, therefore
+    we create our own mock class here.
+    """
+
+    def __init__(self, data=None):
+        self._data = data if data else {}
+
+    def as_dict(self):
+        return self._data
+
+
+def _mock_server(name):
+    server = SimpleMock({'id': base_server_id.format(name), 'name': name})
+    server.id = base_server_id.format(name)
+    server.name = name
+    return server
+
+
+class AzPostgresTest(unittest.TestCase):
+    """Tests for AzPostgres plugin."""
+
+    def _patch(self, target):
+        patcher = mock.patch('cloudmarker.clouds.azpostgres.' + target)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def setUp(self):
+        self._patch('ServicePrincipalCredentials')
+
+        mock_sub_record = SimpleMock(copy.deepcopy(base_subscription_record))
+        m = self._patch('SubscriptionClient')
+        m().subscriptions.list.return_value = [mock_sub_record]
+
+        m = self._patch('PostgreSQLManagementClient')
+        self._MockPostgreSQLManagementClient = m
+        m().servers.list.return_value = [_mock_server('foo_server')]
+        m().servers.get.return_value = SimpleMock({
+            'id': base_server_id.format('foo_server'),
+            'name': 'foo_server',
+        })
+        m().configurations.list_by_server.return_value = [
+            SimpleMock(copy.deepcopy(c)) for c in base_configurations
+        ]
+
+    def test_postgres_server(self):
+        records = list(azpostgres.AzPostgres('', '', '').read())
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['ext'], {
+            'cloud_type': 'azure',
+            'record_type': 'postgresql_server',
+            'subscription_id': base_sub_id,
+            'subscription_name': 'foo_display_name',
+            'subscription_state': 'foo_state',
+            'log_checkpoints_enabled': True,
+            'log_connections_enabled': False,
+            'log_disconnections_enabled': True,
+            'log_duration_enabled': False,
+            'connection_throttling_enabled': True,
+            'log_retention_days': 3,
+        })
+        self.assertEqual(records[0]['com']['cloud_type'], 'azure')
+        self.assertEqual(records[0]['com']['record_type'], 'rdbms')
+        self.assertEqual(records[0]['com']['reference'],
+                         base_server_id.format('foo_server'))
+        self.assertEqual(records[0]['raw']['configuration'],
+                         base_configurations)
+
+    def test_max_recs(self):
+        m = self._MockPostgreSQLManagementClient
+        m().servers.list.return_value = [
+            _mock_server('foo_server'),
+            _mock_server('bar_server'),
+            _mock_server('baz_server'),
+        ]
+        records = list(azpostgres.AzPostgres('', '', '', _max_recs=2).read())
+        self.assertEqual(len(records), 2)
+
+    def test_throttled_server_list(self):
+        m = self._MockPostgreSQLManagementClient
+        m().servers.list.side_effect = ClientRequestError('foo')
+        records = list(azpostgres.AzPostgres('', '', '').read())
+        self.assertEqual(records, [])
@@ -0,0 +1,16 @@
+"""Tests for baseconfig module."""
+
+
+import unittest
+
+import yaml
+
+from cloudmarker import baseconfig
+
+
+class BaseConfigTest(unittest.TestCase):
+    """Tests for baseconfig module."""
+
+    def test_config_dict(self):
+        self.assertEqual(baseconfig.config_dict,
+                         yaml.safe_load(baseconfig.config_yaml))
@@ -0,0 +1,43 @@
+"""Tests for EmailAlert plugin."""
+
+
+import unittest
+from unittest import mock
+
+from cloudmarker.alerts import emailalert
+
+
+class EmailAlertTest(unittest.TestCase):
+    """Tests for EmailAlert plugin."""
+
+    @mock.patch('cloudmarker.util.send_email')
+    def test_done_content(self, mock_send_email):
+        alert = emailalert.EmailAlert(from_addr='a@example.com',
+                                      to_addrs=['b@example.com'],
+                                      subject='foo')
+        alert.write({'ext': {'a': 1}, 'com': {'b': 2}})
+        alert.write({'com': {'c': 3}})
+        alert.done()
+        mock_send_email.assert_called_once_with(
+            from_addr='a@example.com', to_addrs=['b@example.com'],
+            subject='foo',
+            content="{'a': 1}\n\n{'b': 2}\n\n{'c': 3}")
+
+    @mock.patch('cloudmarker.util.send_email')
+    def test_done_resets_buffer(self, mock_send_email):
+        alert = emailalert.EmailAlert()
+        alert.write({'com': {'a': 1}})
+        alert.done()
+        alert.write({'com': {'b': 2}})
+        alert.done()
+        self.assertEqual(mock_send_email.call_args[1]['content'],
+                         "{'b': 2}")
+
+    @mock.patch('cloudmarker.util.send_email')
+    def test_done_empty_record_first(self, mock_send_email):
+        alert = emailalert.EmailAlert()
+        alert.write({})
+        alert.write({'com': {'a': 1}, 'ext': {'b': 2}})
+        alert.done()
+        self.assertEqual(mock_send_email.call_args[1]['content'],
+                         "{'a': 1}\n\n{'b': 2}")
@@ -1,5 +1,6 @@
 """Tests for ioworkers module."""
 
+import threading
 import unittest
 
 from cloudmarker import ioworkers
@@ -17,3 +18,13 @@ class UtilTest(unittest.TestCase):
         out = ioworkers.run(lambda: ((i,) for i in range(5)),
                             lambda x: [x**2], 1, 1)
         self.assertEqual(list(out), [0, 1, 4, 9, 16])
+
+    def test_run_output_larger_than_batch(self):
+        out = ioworkers.run(lambda: [(150,), (3,)], range, 1, 1)
+        self.assertEqual(list(out), list(range(150)) + list(range(3)))
+
+    def test_run_single_process_unpicklable_output(self):
+        lock = threading.Lock()
+        out = ioworkers.run(lambda: ((i,) for i in range(3)),
+                            lambda x: [(x, lock)], 1, 2)
+        self.assertEqual(sorted(x for x, _ in out), [0, 1, 2])
@@ -1,12 +1,30 @@
 """Tests for util module."""
 
 import os
+import threading
 import unittest
+from unittest import mock
+
+import msrest
 
 from cloudmarker import util
 from cloudmarker.test import data_path
 
 
+def _mock_az_client_class():
+    """Return a mock Azure client class.
+
+    The clients it creates are mocks with a real msrest configuration,
+    so that the retry policy set up by :func:`util.get_az_client` can
+    be checked.
+    """
+    def new_client(*args):
+        client = mock.Mock()
+        client.config = msrest.Configuration('https://example.com')
+        return client
+    return mock.Mock(side_effect=new_client)
+
+
 class MockPlugin():
     """A mock plugin to test plugin loading."""
 
@@ -275,3 +293,140 @@ class UtilTest(unittest.TestCase):
         self.assertEqual(util.outline_az_sub(1, sub, 'foo_tenant'),
                          'subscription #1: foo_id (foo_name) '
                          '(foo_state); tenant: foo_tenant')
+
+    def test_get_az_subscriptions_skips_failed_ids(self):
+        sub_client = mock.Mock()
+        sub_client.subscriptions.get.side_effect = [
+            Exception('foo'), 'bar_sub', Exception('baz'), 'qux_sub']
+        subs = util.get_az_subscriptions(
+            sub_client, ['foo_id', 'bar_id', 'baz_id', 'qux_id'],
+            'foo_tenant')
+        self.assertEqual(list(subs), ['bar_sub', 'qux_sub'])
+
+    def test_get_az_subscriptions_without_ids(self):
+        sub_client = mock.Mock()
+        sub_client.subscriptions.list.return_value = ['foo_sub', 'bar_sub']
+        subs = util.get_az_subscriptions(sub_client, None, 'foo_tenant')
+        self.assertEqual(list(subs), ['foo_sub', 'bar_sub'])
+        sub_client.subscriptions.get.assert_not_called()
+
+    @mock.patch('smtplib.SMTP_SSL')
+    def test_send_email_reuses_smtp_session(self, mock_smtp_ssl):
+        self.addCleanup(util.close_smtp_sessions)
+        mock_smtp_ssl().noop.return_value = (250, b'OK')
+        mock_smtp_ssl.reset_mock()
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'bar')
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'baz')
+        self.assertEqual(mock_smtp_ssl.call_count, 1)
+        self.assertEqual(mock_smtp_ssl().sendmail.call_count, 2)
+        mock_smtp_ssl().quit.assert_not_called()
+
+    @mock.patch('smtplib.SMTP_SSL')
+    def test_send_email_reconnects_stale_smtp_session(self, mock_smtp_ssl):
+        self.addCleanup(util.close_smtp_sessions)
+        mock_smtp_ssl().noop.side_effect = OSError('foo')
+        mock_smtp_ssl.reset_mock()
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'bar')
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'baz')
+        self.assertEqual(mock_smtp_ssl.call_count, 2)
+        self.assertEqual(mock_smtp_ssl().sendmail.call_count, 2)
+
+    @mock.patch('smtplib.SMTP_SSL')
+    def test_send_email_smtp_timeout(self, mock_smtp_ssl):
+        self.addCleanup(util.close_smtp_sessions)
+        mock_smtp_ssl.reset_mock()
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'bar')
+        self.assertGreater(mock_smtp_ssl.call_args[1]['timeout'], 0)
+
+    @mock.patch('smtplib.SMTP_SSL')
+    def test_close_smtp_sessions(self, mock_smtp_ssl):
+        smtp = mock_smtp_ssl.return_value
+        smtp.noop.return_value = (250, b'OK')
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'bar')
+        util.close_smtp_sessions()
+        smtp.quit.assert_called_once_with()
+        util.send_email('a@example.com', ['b@example.com'], 'foo', 'baz')
+        util.close_smtp_sessions()
+        self.assertEqual(mock_smtp_ssl.call_count, 2)
+
+    @mock.patch('smtplib.SMTP_SSL')
+    def test_send_email_message(self, mock_smtp_ssl):
+        self.addCleanup(util.close_smtp_sessions)
+        util.send_email('a@example.com', ['b@example.com', 'c@example.com'],
+                        'foo', 'bar\nbaz')
+        args = mock_smtp_ssl().sendmail.call_args[0]
+        self.assertEqual(args[0], 'a@example.com')
+        self.assertEqual(args[1], ['b@example.com', 'c@example.com'])
+        self.assertEqual(args[2],
+                         b'From: a@example.com\r\n'
+                         b'To: b@example.com, c@example.com\r\n'
+                         b'Subject: foo\r\n'
+                         b'Content-Type: text/plain; charset="utf-8"\r\n'
+                         b'Content-Transfer-Encoding: 7bit\r\n'
+                         b'MIME-Version: 1.0\r\n'
+                         b'\r\n'
+                         b'bar\r\nbaz\r\n')
+
+    @mock.patch('cloudmarker.util._az_clients', threading.local())
+    def test_get_az_client_reuses_client_for_same_subscription(self):
+        m = _mock_az_client_class()
+        client1 = util.get_az_client(m, 'foo_creds', 'foo_sub_id')
+        client2 = util.get_az_client(m, 'foo_creds', 'foo_sub_id')
+        self.assertIs(client1, client2)
+        self.assertTrue(client1.config.keep_alive)
+        m.assert_called_once_with('foo_creds', 'foo_sub_id')
+
+    @mock.patch('cloudmarker.util._az_clients', threading.local())
+    def test_get_az_client_without_subscription(self):
+        m = _mock_az_client_class()
+        client1 = util.get_az_client(m, 'foo_creds', None)
+        client2 = util.get_az_client(m, 'foo_creds', None)
+        self.assertIs(client1, client2)
+        m.assert_called_once_with('foo_creds')
+
+    @mock.patch('cloudmarker.util._az_clients', threading.local())
+    def test_get_az_client_interleaved_subscriptions(self):
+        m = _mock_az_client_class()
+        clients = set()
+        for _ in range(3):
+            for sub_id in ('foo_sub_id', 'bar_sub_id', 'baz_sub_id'):
+                clients.add(util.get_az_client(m, 'foo_creds', sub_id))
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(len(clients), 3)
+        for client in clients:
+            client.close.assert_not_called()
+
+    @mock.patch('cloudmarker.util._az_clients', threading.local())
+    def test_get_az_client_separates_credentials(self):
+        m = _mock_az_client_class()
+        creds1 = object()
+        creds2 = object()
+        client1 = util.get_az_client(m, creds1, 'foo_sub_id')
+        client2 = util.get_az_client(m, creds2, 'foo_sub_id')
+        self.assertIsNot(client1, client2)
+        self.assertIs(util.get_az_client(m, creds1, 'foo_sub_id'), client1)
+        self.assertEqual(m.call_count, 2)
+
+    @mock.patch('cloudmarker.util._AZ_CLIENTS_MAX', 2)
+    @mock.patch('cloudmarker.util._az_clients', threading.local())
+    def test_get_az_client_closes_least_recently_used_client(self):
+        m = _mock_az_client_class()
+        client1 = util.get_az_client(m, 'foo_creds', 'foo_sub_id')
+        client2 = util.get_az_client(m, 'foo_creds', 'bar_sub_id')
+        util.get_az_client(m, 'foo_creds', 'foo_sub_id')
+        util.get_az_client(m, 'foo_creds', 'baz_sub_id')
+        client1.close.assert_not_called()
+        client2.close.assert_called_once_with()
+        self.assertEqual(m.call_count, 3)
+
+    @mock.patch('cloudmarker.util._az_clients', threading.local())
+    def test_get_az_client_retries_throttled_requests(self):
+        m = _mock_az_client_class()
+        client = util.get_az_client(m, 'foo_creds', 'foo_sub_id')
+        retry_policy = client.config.retry_policy
+        retry = retry_policy()
+        self.assertIn(429, retry.status_forcelist)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertTrue(retry.is_retry('GET', 429))
+        self.assertEqual(retry_policy.retries, 3)
+        self.assertEqual(retry_policy.max_backoff, 90)
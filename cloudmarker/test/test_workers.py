@@ -107,6 +107,14 @@ class WorkersTest(unittest.TestCase):
                           mock.call().done()]
         self.assertEqual(MockPluginClass.mock_calls, expected_calls)
 
+    @mock.patch('cloudmarker.util.close_smtp_sessions')
+    def test_alert_worker_closes_smtp_sessions(self, mock_close):
+        in_q = mp.Queue()
+        in_q.put(None)
+        workers.alert_worker('fooaudit', 'fooversion', 'fooalert',
+                             plugin_config, in_q)
+        mock_close.assert_called_once_with()
+
     def test_event_worker(self):
         # A fake_eval function that returns two fake records: length of
         # input string, and upper-cased input string.
@@ -2,13 +2,17 @@
 
 
 import argparse
+import collections
 import copy
-import email
+import email.message
+import email.policy
+import functools
 import importlib
 import logging
 import os
 import smtplib
 import textwrap
+import threading
 
 import yaml
 
@@ -17,6 +21,23 @@ from cloudmarker import baseconfig
 
 _log = logging.getLogger(__name__)
 
+# Open SMTP sessions keyed by the process ID and the connection
+# parameters. See _get_smtp_session() for details.
+_smtp_sessions = {}
+
+# Timeout in seconds for blocking SMTP socket operations, so that a
+# cached session whose connection was dropped silently cannot hold up
+# alerting for long.
+_SMTP_TIMEOUT = 60
+
+# Azure management clients cached by each thread. See get_az_client()
+# for details.
+_az_clients = threading.local()
+
+# Maximum number of Azure management clients cached by each thread.
+# Each cached client may hold one open connection.
+_AZ_CLIENTS_MAX = 16
+
 
 def load_config(config_paths):
     """Load configuration from specified configuration paths.
@@ -39,7 +60,7 @@ def load_config(config_paths):
 
         _log.info('Found %s', config_path)
         with open(config_path) as f:
-            new_config = yaml.safe_load(f)
+            new_config = yaml.load(f, Loader=baseconfig.SafeLoader)
             config = merge_dicts(config, new_config)
 
     return config
@@ -530,6 +551,12 @@ def send_email(from_addr, to_addrs, subject, content,
     SMTP authentication is done. If ``username`` is specified as a
     non-empty string, then SMTP authentication is done.
 
+    The SMTP session is kept open after the email is sent and reused by
+    subsequent calls with the same ``host``, ``port``, ``ssl_mode``,
+    and ``username`` in the same process. Call
+    :func:`close_smtp_sessions` once no more emails are to be sent for
+    a while.
+
     Arguments:
         from_addr (str): Sender's email address.
         to_addrs (list): A list of :obj:`str` objects where each
@@ -553,41 +580,169 @@ def send_email(from_addr, to_addrs, subject, content,
     log_data = ('from_addr: {}; to_addrs: {}; subject: {}; host: {}; '
                 'port: {}; ssl_mode: {}'
                 .format(from_addr, to_addrs, subject, host, port, ssl_mode))
+    if ssl_mode not in ('ssl', 'starttls', 'disable'):
+        _log.error('Cannot send email; %s; error: %s: %s', log_data,
+                   'invalid ssl_mode', ssl_mode)
+        return
+
+    session_key = (os.getpid(), host, port, ssl_mode, username)
     try:
-        if ssl_mode == 'ssl':
-            smtp = smtplib.SMTP_SSL(host, port)
-            smtp.set_debuglevel(debug)
-        elif ssl_mode == 'starttls':
-            smtp = smtplib.SMTP(host, port)
-            smtp.set_debuglevel(debug)
-            smtp.starttls()
-        elif ssl_mode == 'disable':
-            smtp = smtplib.SMTP(host, port)
-            smtp.set_debuglevel(debug)
-        else:
-            _log.error('Cannot send email; %s; error: %s: %s', log_data,
-                       'invalid ssl_mode', ssl_mode)
-            return
+        smtp = _get_smtp_session(session_key, password, debug)
 
-        if username:
-            smtp.login(username, password)
+        msg = (_render_email_headers(from_addr, tuple(to_addrs), subject) +
+               _render_email_body(content))
 
-        msg = email.message.EmailMessage()
-        msg['From'] = from_addr
-        msg['To'] = ', '.join(to_addrs)
-        msg['Subject'] = subject
-        msg.set_content(content)
-
-        smtp.send_message(msg)
-        smtp.quit()
+        smtp.sendmail(from_addr, to_addrs, msg)
 
         _log.info('Sent email successfully; %s', log_data)
 
     except Exception as e:
+        # Do not reuse a session that may be left in a bad state.
+        _close_smtp_session(session_key)
         _log.error('Failed to send email; %s; error: %s: %s', log_data,
                    type(e).__name__, e)
 
 
+@functools.lru_cache(maxsize=32)
+def _render_email_headers(from_addr, to_addrs, subject):
+    """Render the ``From``, ``To``, and ``Subject`` email headers.
+
+    These headers remain the same for every email sent with the same
+    arguments, so they are rendered only once and reused.
+
+    Arguments:
+        from_addr (str): Sender's email address.
+        to_addrs (tuple): Recipients' email addresses.
+        subject (str): Email subject.
+
+    Returns:
+        bytes: Rendered headers, each terminated with CRLF.
+
+    """
+    msg = email.message.EmailMessage(policy=email.policy.SMTP)
+    msg['From'] = from_addr
+    msg['To'] = ', '.join(to_addrs)
+    msg['Subject'] = subject
+
+    # Drop the CRLF that separates the headers from the empty body.
+    return msg.as_bytes()[:-2]
+
+
+def _render_email_body(content):
+    """Render the MIME headers and the body of a plain text email.
+
+    ASCII content whose lines fit within the 998 character limit of
+    RFC 5322 is sent as is with ``7bit`` transfer encoding. The bytes
+    are built directly, which is much cheaper than running the content
+    through the :mod:`email` package. Any other content is encoded by
+    :class:`email.message.EmailMessage`.
+
+    Arguments:
+        content (str): Email content.
+
+    Returns:
+        bytes: MIME headers, a blank line, and the email body.
+
+    """
+    try:
+        lines = content.encode('ascii').splitlines()
+    except UnicodeEncodeError:
+        lines = None
+
+    if lines is not None and all(len(line) <= 998 for line in lines):
+        return (b'Content-Type: text/plain; charset="utf-8"\r\n'
+                b'Content-Transfer-Encoding: 7bit\r\n'
+                b'MIME-Version: 1.0\r\n'
+                b'\r\n' + b'\r\n'.join(lines) + b'\r\n')
+
+    msg = email.message.EmailMessage(policy=email.policy.SMTP)
+    msg.set_content(content)
+    return msg.as_bytes()
+
+
+def _get_smtp_session(session_key, password, debug):
+    """Return an open SMTP session for the specified session key.
+
+    If a session for ``session_key`` is already open and the SMTP
+    server still responds to a ``NOOP`` command, then that session is
+    returned. Otherwise a new session is created, cached, and returned.
+
+    The process ID is part of ``session_key``, so that a child process
+    forked by :mod:`multiprocessing` never reuses the socket of a
+    session opened by its parent process.
+
+    Arguments:
+        session_key (tuple): A tuple of process ID, SMTP host, SMTP
+            port, SSL mode, and SMTP username.
+        password (str): SMTP password.
+        debug (int or bool): Debug level for a new SMTP session.
+
+    Returns:
+        smtplib.SMTP: An open SMTP session.
+
+    """
+    smtp = _smtp_sessions.get(session_key)
+    if smtp is not None:
+        try:
+            if smtp.noop()[0] == 250:
+                return smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close_smtp_session(session_key)
+
+    _, host, port, ssl_mode, username = session_key
+
+    if ssl_mode == 'ssl':
+        smtp = smtplib.SMTP_SSL(host, port, timeout=_SMTP_TIMEOUT)
+    else:
+        smtp = smtplib.SMTP(host, port, timeout=_SMTP_TIMEOUT)
+
+    # Debug output is written to stderr for every SMTP command, so
+    # enable it only when it is asked for.
+    if debug:
+        smtp.set_debuglevel(debug)
+
+    if ssl_mode == 'starttls':
+        smtp.starttls()
+
+    if username:
+        smtp.login(username, password)
+
+    _smtp_sessions[session_key] = smtp
+    return smtp
+
+
+def _close_smtp_session(session_key):
+    """Close and forget the SMTP session for the specified session key.
+
+    Arguments:
+        session_key (tuple): Session key as described in
+            :func:`_get_smtp_session`.
+
+    """
+    smtp = _smtp_sessions.pop(session_key, None)
+    if smtp is None:
+        return
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+def close_smtp_sessions():
+    """Close all SMTP sessions opened by the current process.
+
+    The sessions opened by :func:`send_email` are not closed
+    automatically, so this should be called once the current process
+    is done sending emails, e.g., at the end of a run.
+
+    """
+    pid = os.getpid()
+    for session_key in list(_smtp_sessions):
+        if session_key[0] == pid:
+            _close_smtp_session(session_key)
+
+
 def outline_az_sub(sub_index, sub, tenant):
     """Return a summary of an Azure subscription for logging purpose.
 
@@ -605,6 +760,116 @@ def outline_az_sub(sub_index, sub, tenant):
                     sub.get('display_name'), sub.get('state'), tenant))
 
 
+def get_az_subscriptions(sub_client, sub_ids, tenant):
+    """Get Azure subscriptions with the specified IDs.
+
+    If ``sub_ids`` is ``None`` or empty, all subscriptions accessible
+    to the service principal are listed. Otherwise each subscription is
+    looked up individually. A subscription that cannot be looked up,
+    e.g., because its ID is wrong or the service principal has no
+    access to it, is logged and skipped, so that the remaining
+    subscriptions are still fetched.
+
+    Arguments:
+        sub_client (SubscriptionClient): Azure subscription client.
+        sub_ids (list): Subscription IDs.
+        tenant (str): Azure tenant ID (for logging only).
+
+    Yields:
+        Subscription: Azure subscription model object.
+
+    """
+    if not sub_ids:
+        yield from sub_client.subscriptions.list()
+        return
+
+    for sub_id in sub_ids:
+        try:
+            sub = sub_client.subscriptions.get(sub_id)
+        except Exception as e:
+            _log.error('Failed to fetch subscription: %s; tenant: %s; '
+                       'error: %s: %s', sub_id, tenant, type(e).__name__, e)
+            continue
+        yield sub
+
+
+def get_az_client(client_class, credentials, sub_id):
+    """Return an Azure management client cached for the current thread.
+
+    The client is created with ``keep_alive`` enabled, so that its
+    connection to Azure is not closed after every request and the
+    following requests for the same subscription, including requests
+    for further pages of a list, reuse it instead of repeating the TCP
+    and TLS handshakes.
+
+    Clients are cached per thread and keyed by the client class, the
+    credentials object and the subscription ID, so work units of
+    different subscriptions and plugins can be interleaved on the same
+    thread without rebuilding clients. Each thread keeps at most
+    ``_AZ_CLIENTS_MAX`` clients; the least recently used client is
+    closed when the limit is exceeded, so the number of open
+    connections stays bounded regardless of the number of
+    subscriptions.
+
+    The client also retries requests throttled by Azure with HTTP 429,
+    waiting for the period in the ``Retry-After`` header sent by Azure
+    before each retry. If a request is still throttled after the
+    retries are used up, the SDK raises
+    :class:`msrest.exceptions.ClientRequestError` instead of the
+    :class:`msrestazure.azure_exceptions.CloudError` it raises for a
+    throttled request that is not retried. Callers that handle
+    ``CloudError`` must therefore handle
+    :class:`msrest.exceptions.ClientException` too.
+
+    Arguments:
+        client_class (type): Azure management client class.
+        credentials (ServicePrincipalCredentials): Credentials.
+        sub_id (str): Subscription ID. If ``None`` is specified, the
+            client is created without a subscription ID, e.g., for
+            :class:`azure.mgmt.resource.SubscriptionClient`.
+
+    Returns:
+        msrest.service_client.SDKClient: An Azure management client.
+
+    """
+    clients = getattr(_az_clients, 'clients', None)
+    if clients is None:
+        clients = _az_clients.clients = collections.OrderedDict()
+
+    key = (client_class, id(credentials), sub_id)
+    entry = clients.get(key)
+    if entry is not None:
+        clients.move_to_end(key)
+        return entry[1]
+
+    if sub_id is None:
+        client = client_class(credentials)
+    else:
+        client = client_class(credentials, sub_id)
+    client.config.keep_alive = True
+
+    # By default msrest does not retry throttled requests (HTTP
+    # 429), so a throttled list call would drop the rest of the
+    # list. Retry them too. Retry.new() copies the other settings of
+    # the msrest retry policy; only its maximum back-off is kept as an
+    # instance attribute, so carry it over explicitly.
+    retry_policy = client.config.retry_policy
+    max_backoff = retry_policy.max_backoff
+    status_forcelist = set(retry_policy.policy.status_forcelist or ())
+    retry_policy.policy = retry_policy.policy.new(
+        status_forcelist=status_forcelist | {429})
+    retry_policy.max_backoff = max_backoff
+
+    # The credentials object is kept in the cache along with the
+    # client, so that its id() cannot be reused by another object
+    # while the client is cached.
+    clients[key] = (credentials, client)
+    if len(clients) > _AZ_CLIENTS_MAX:
+        _, (_, lru_client) = clients.popitem(last=False)
+        lru_client.close()
+    return client
+
+
 def outline_gcp_project(project_index, project, zone, key_file_path):
     """Return a summary of a GCP project for logging purpose.
 
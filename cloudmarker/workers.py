@@ -180,6 +180,10 @@ def alert_worker(audit_key, audit_version, plugin_key, plugin_config,
     _write_worker(audit_key, audit_version, plugin_key, plugin_config,
                   input_queue, 'alert')
 
+    # This worker subprocess exits without running exit handlers, so
+    # close the SMTP sessions opened by alert plugins here.
+    util.close_smtp_sessions()
+
 
 def _write_worker(audit_key, audit_version, plugin_key, plugin_config,
                   input_queue, worker_type):